@@ -0,0 +1,66 @@
+import pandas as pd
+import argparse
+import sys
+import os
+from Bio import Phylo
+
+from utils import read_json, build_time_slice
+
+def check_files(files:list):
+
+    for file in files:
+        if os.path.isfile(file) is False:
+            print(f'File {file} was not found!')
+            sys.exit(2)
+
+def tabulate_hits(hits:dict, lineages_dict:dict, index, file_name:str):
+
+    rows = []
+    for query, tax_ids in hits.items():
+        for tax_id in tax_ids:
+            age, parent_age = index.intervals[tax_id]
+            rows.append({'QUERY': query, 'TAX_ID': tax_id, 'NAME': lineages_dict[tax_id].get('name'),
+                         'AGE': age, 'PARENT_AGE': parent_age})
+
+    table = pd.DataFrame(rows, columns=['QUERY', 'TAX_ID', 'NAME', 'AGE', 'PARENT_AGE'])
+    table.to_csv(file_name, sep='\t', index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Get the resolved clades that span a given age or have an age within a given range.")
+    parser.add_argument("--prefix", type=str, default='./', help="Option to declare folder of the input and output files. Default is current directory.")
+    parser.add_argument("--age", type=float, nargs='+', help="Age(s) (in million years) at which to slice the tree.")
+    parser.add_argument("--range", type=float, nargs=2, action='append', metavar=('MIN', 'MAX'), \
+                        help="Return all clades with an age between MIN and MAX. Can be given multiple times.")
+    parser.add_argument("--output", type=str, default='TimeTree5_time_slice.tsv', help="Name of the output file (written to prefix).")
+    args = parser.parse_args()
+
+    if args.age is None and args.range is None:
+        parser.error('Either --age or --range is required.')
+
+    if args.prefix[-1] != '/':
+        args.prefix += '/'
+
+    # Declare file names
+    ages_file = f'{args.prefix}TimeTree5_lineages_resolved.json'
+    tree_file = f'{args.prefix}TimeTree5_renamed_resolved.nwk'
+
+    # Check if files exist
+    check_files([ages_file, tree_file])
+
+    # Read in files and build index
+    lineages_dict = read_json(ages_file)
+    tree = Phylo.read(tree_file, 'newick', rooted=True)
+    index = build_time_slice(lineages_dict, tree)
+
+    hits = {}
+    if args.age is not None:
+        hits.update(index.get_slices(args.age))
+    if args.range is not None:
+        hits.update({f'{min_age}-{max_age}': tax_ids for (min_age, max_age), tax_ids in index.get_ranges(args.range).items()})
+
+    tabulate_hits(hits, lineages_dict, index, f'{args.prefix}{args.output}')
+
+    return 0
+
+if __name__ == "__main__":
+    main()
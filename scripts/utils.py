@@ -1,3 +1,4 @@
+from bisect import bisect_left, bisect_right
 from Bio import Phylo
 import json
 import pandas as pd
@@ -10,6 +11,8 @@ class TimeTree:
         self.tree, self.leaves = None, None
         self.lineages_dict = {}
         self.reversed_dict = {}
+        self.depth = {}
+        self.jumps = []
         self.folder = folder
 
     def read_tax_ids(self, file_name:str) :
@@ -46,6 +49,7 @@ class TimeTree:
     def read_lineages(self, lineages_file:str, reversed_ineages_file:str):
         self.lineages_dict = read_json(lineages_file)
         self.reversed_dict = read_json(reversed_ineages_file)
+        self.build_ancestor_index()
 
     def set_inner_node(self, tax_id:str, mrca):
         node_name = mrca.name
@@ -88,17 +92,70 @@ class TimeTree:
 
         return lineage
 
-    def check_ancestry(self, tax1:str, tax2:str) -> tuple[str, list, list]:
+    def build_ancestor_index(self) -> None:
+        """
+        Builds the depth of each taxon and the binary lifting tables over the reversed_dict.
+        jumps[k][id] holds the 2^k-th ancestor of id, the root ('1') is its own ancestor.
+        The index is built in read_lineages and relies on reversed_dict (the taxonomy) not being
+        changed afterwards. clean_up_lineages and replace_neighbour only rewrite the neighbours in
+        lineages_dict, so it stays valid during the resolution. Call it again whenever
+        reversed_dict is replaced.
+        """
+        parents = dict(self.reversed_dict)
+        parents['1'] = '1'
+
+        self.depth = {'1': 0}
+        for id in parents.keys():
+            path = []
+            clade = id
+            while clade not in self.depth:
+                path.append(clade)
+                clade = parents[clade]
+            for clade in reversed(path):
+                self.depth[clade] = self.depth[parents[clade]] + 1
+
+        self.jumps = [parents]
+        for _ in range(1, max(self.depth.values()).bit_length()):
+            previous = self.jumps[-1]
+            self.jumps.append({id: previous[previous[id]] for id in previous.keys()})
+
+    def get_ancestor(self, id:str, steps:int) -> str:
+        k = 0
+        while steps > 0:
+            if steps & 1:
+                id = self.jumps[k][id]
+            steps >>= 1
+            k += 1
+        return id
+
+    def get_lca(self, tax1:str, tax2:str) -> str:
+
+        if self.depth[tax1] < self.depth[tax2]:
+            tax1, tax2 = tax2, tax1
+        tax1 = self.get_ancestor(tax1, self.depth[tax1] - self.depth[tax2])
+
+        if tax1 == tax2:
+            return tax1
+
+        for jump in reversed(self.jumps):
+            if jump[tax1] != jump[tax2]:
+                tax1, tax2 = jump[tax1], jump[tax2]
+
+        return self.jumps[0][tax1]
+
+    def get_lineage_until(self, id:str, ancestor:str) -> list:
+        lineage = []
+        while id != ancestor:
+            lineage.append(id)
+            id = self.reversed_dict[id]
 
-        lineage1 = self.get_lineage_back(tax1)
-        lineage2 = self.get_lineage_back(tax2)
+        return lineage
 
-        for clade in lineage1:
-            if clade in lineage2:
-                mrca = clade
-                break
+    def check_ancestry(self, tax1:str, tax2:str) -> tuple[str, list, list]:
 
-        return mrca, lineage1[:lineage1.index(mrca)], lineage2[:lineage2.index(mrca)]
+        mrca = self.get_lca(tax1, tax2)
+
+        return mrca, self.get_lineage_until(tax1, mrca), self.get_lineage_until(tax2, mrca)
     
     def get_leaf(self, id):
 
@@ -193,4 +250,117 @@ def read_timetree(tree_file) -> tuple[Phylo.BaseTree.Tree, list]:
     tabulate_names(tree, len(external))
     leaf_names = tree.get_terminals()
     
-    return tree, leaf_names
\ No newline at end of file
+    return tree, leaf_names
+
+
+class TimeSlice:
+
+    def __init__(self, intervals:list):
+        """
+        intervals is a list of (tax_id, age, parent_age) tuples, where the clade spans
+        from the age of its parent node (start of the branch) to its own age.
+        The root has no parent, its parent_age is float('inf') so it spans all older ages.
+        """
+        self.intervals = {tax_id: (age, parent_age) for tax_id, age, parent_age in intervals}
+
+        # Sorted node ages for range queries
+        by_age = sorted((age, tax_id) for tax_id, age, _ in intervals)
+        self.ages = [age for age, _ in by_age]
+        self.tax_ids = [tax_id for _, tax_id in by_age]
+
+        # Centered interval tree for slice queries
+        self.root = self.build_node([(age, parent_age, tax_id) for tax_id, age, parent_age in intervals])
+
+    def build_node(self, intervals:list) -> dict | None:
+
+        if not intervals:
+            return None
+
+        starts = sorted(start for start, _, _ in intervals)
+        center = starts[len(starts) // 2]
+
+        left, right, overlap = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                overlap.append(interval)
+
+        return {'center': center,
+                'by_start': sorted(overlap, key=lambda x: x[0]),
+                'by_end': sorted(overlap, key=lambda x: x[1], reverse=True),
+                'left': self.build_node(left),
+                'right': self.build_node(right)}
+
+    def get_slice(self, age:float) -> list:
+        """
+        Returns the tax_ids of all clades whose branch spans the given age.
+        """
+        found = []
+        node = self.root
+
+        while node is not None:
+            if age < node['center']:
+                for start, _, tax_id in node['by_start']:
+                    if start > age:
+                        break
+                    found.append(tax_id)
+                node = node['left']
+
+            elif age > node['center']:
+                for _, end, tax_id in node['by_end']:
+                    if end < age:
+                        break
+                    found.append(tax_id)
+                node = node['right']
+
+            else:
+                found += [tax_id for _, _, tax_id in node['by_start']]
+                break
+
+        return found
+
+    def get_range(self, min_age:float, max_age:float) -> list:
+        """
+        Returns the tax_ids of all clades with an age between min_age and max_age (inclusive).
+        """
+        return self.tax_ids[bisect_left(self.ages, min_age):bisect_right(self.ages, max_age)]
+
+    def get_slices(self, ages:list) -> dict:
+        return {age: self.get_slice(age) for age in ages}
+
+    def get_ranges(self, ranges:list) -> dict:
+        return {(min_age, max_age): self.get_range(min_age, max_age) for min_age, max_age in ranges}
+
+def build_time_slice(lineages_dict:dict, tree:Phylo.BaseTree.Tree) -> TimeSlice:
+    """
+    Builds a TimeSlice from the resolved lineages and the resolved tree.
+    Only clades included in the tree with a known age are considered, the parent age is
+    the age of the clade plus the length of the branch leading to it (open-ended for the root).
+    Numeric inner node labels (tax ids) are read by Phylo as confidence values, these are
+    used as names instead.
+    """
+    intervals = []
+    for clade in tree.find_clades():
+        name = clade.name
+        if name is None and clade.confidence is not None:
+            confidence = clade.confidence
+            if isinstance(confidence, float) and confidence.is_integer():
+                confidence = int(confidence)
+            name = str(confidence)
+        if name not in lineages_dict:
+            continue
+        entry = lineages_dict[name]
+        if entry['included'] != 1 or entry['age'] is None:
+            continue
+
+        age = float(entry['age'])
+        if clade is tree.root:
+            parent_age = float('inf')
+        else:
+            parent_age = age + (clade.branch_length or 0)
+        intervals.append((name, age, parent_age))
+
+    return TimeSlice(intervals)
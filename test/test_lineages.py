@@ -3,6 +3,8 @@ import unittest
 import sys
 import os
 import json
+import tempfile
+from io import StringIO
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
 from utils import *
@@ -96,4 +98,67 @@ class TestLineageRetrieval(unittest.TestCase):
         self.assertEqual(age, 2)
 
         age = data.get_distance("*AB", 'A')
-        self.assertEqual(age, 1)
\ No newline at end of file
+        self.assertEqual(age, 1)
+
+    def test_get_lca(self):
+
+        data = TimeTree('./')
+        data.read_lineages('lineages1.json', 'reverse_lineage.json')
+
+        self.assertEqual(data.depth['A'], 4)
+        self.assertEqual(data.get_ancestor('A', 3), 'ABC')
+        self.assertEqual(data.get_lca('A', 'B'), 'AB1')
+        self.assertEqual(data.get_lca('A', 'C'), 'ABC')
+        self.assertEqual(data.get_lca('AB2', 'A'), 'AB2')
+        self.assertEqual(data.get_lca('C1', '1'), '1')
+
+    def test_time_slice(self):
+
+        tree, _ = read_timetree('tree1.nwk')
+        lineages = {'A': {'included': 1, 'age': 0}, 'B': {'included': 1, 'age': 0},
+                    'C': {'included': 1, 'age': 0}, '*AB': {'included': 1, 'age': 1},
+                    '*ABC': {'included': 1, 'age': 2}}
+
+        index = build_time_slice(lineages, tree)
+
+        self.assertEqual(index.intervals['*AB'], (1.0, 2.0))
+        self.assertEqual(sorted(index.get_slice(0.5)), ['A', 'B', 'C'])
+        self.assertEqual(sorted(index.get_slice(1.5)), ['*AB', 'C'])
+        self.assertEqual(index.intervals['*ABC'], (2.0, float('inf')))
+        self.assertEqual(index.get_slice(3), ['*ABC'])
+        self.assertEqual(sorted(index.get_range(0.5, 2)), ['*AB', '*ABC'])
+        slices = index.get_slices([2, 3])
+        self.assertEqual(sorted(slices[2]), ['*AB', '*ABC', 'C'])
+        self.assertEqual(slices[3], ['*ABC'])
+
+    def test_time_slice_numeric_labels(self):
+
+        # Name inner nodes with tax ids as set_inner_node does, then write and read back
+        tree = Phylo.read(StringIO('((9606:1,10090:1)AB:1,7955:2)ABC;'), 'newick', rooted=True)
+        tree.find_any('AB').name = '314146'
+        tree.find_any('ABC').name = '1'
+        tree_file = os.path.join(tempfile.mkdtemp(), 'tree.nwk')
+        Phylo.write(tree, tree_file, 'newick')
+        tree = Phylo.read(tree_file, 'newick', rooted=True)
+
+        lineages = {'9606': {'included': 1, 'age': 0}, '10090': {'included': 1, 'age': 0},
+                    '7955': {'included': 1, 'age': 0}, '314146': {'included': 1, 'age': 1},
+                    '1': {'included': 1, 'age': 2}}
+
+        index = build_time_slice(lineages, tree)
+
+        self.assertEqual(index.intervals['314146'], (1.0, 2.0))
+        self.assertEqual(index.intervals['1'], (2.0, float('inf')))
+        self.assertEqual(sorted(index.get_slice(1.5)), ['314146', '7955'])
+        self.assertEqual(sorted(index.get_range(0.5, 3)), ['1', '314146'])
+
+    def test_get_ranges(self):
+
+        index = TimeSlice([('A', 0, 1), ('B', 0, 1), ('AB', 1, 2), ('ABC', 2, float('inf'))])
+
+        ranges = index.get_ranges([(0, 0), (0.5, 1.5), (1, 2), (3, 4)])
+
+        self.assertEqual(sorted(ranges[(0, 0)]), ['A', 'B'])
+        self.assertEqual(ranges[(0.5, 1.5)], ['AB'])
+        self.assertEqual(ranges[(1, 2)], ['AB', 'ABC'])
+        self.assertEqual(ranges[(3, 4)], [])